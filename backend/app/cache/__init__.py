@@ -0,0 +1,5 @@
+"""Caching module."""
+from app.cache.ttl_cache import TTLCache
+from app.cache.single_flight import SingleFlight
+
+__all__ = ["TTLCache", "SingleFlight"]
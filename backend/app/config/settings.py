@@ -29,6 +29,9 @@ class Settings(BaseSettings):
     rate_limit_votes: str = "30/minute"
     rate_limit_reactions: str = "30/minute"
     rate_limit_profile_update: str = "10/minute"
+    rate_limit_ai_generate: str = "5/minute"
+    rate_limit_ai_cached: str = "60/minute"
+    rate_limit_presence: str = "30/minute"
 
     trusted_hosts: List[str] = ["localhost", "127.0.0.1"]
 
@@ -45,10 +48,36 @@ class Settings(BaseSettings):
 
     openai_api_key: str = ""
     openai_enabled: bool = False
+    ai_backend: str = "openai"
+    ai_cache_max_entries: int = 256
 
     webhook_enabled: bool = True
+    warmup_enabled: bool = True
+
+    report_workers: int = 2
+    report_max_pending: int = 32
+    report_cache_entries: int = 128
+    report_prewarm: bool = True
+
+    presence_ttl_seconds: int = 30
+    presence_bucket_seconds: int = 1
+    presence_max_entries: int = 100000
+    presence_max_polls_per_heartbeat: int = 50
+    presence_hll_enabled: bool = True
+    presence_hll_precision: int = 10
+    presence_max_audiences: int = 10000
+
     admin_api_key: str = ""
 
+    profiler_max_duration_seconds: int = 60
+    profiler_default_interval_ms: int = 10
+    profiler_min_interval_ms: int = 5
+    profiler_max_stacks: int = 5000
+    profiler_request_history: int = 20
+    loop_monitor_enabled: bool = True
+    loop_block_threshold_ms: int = 100
+    loop_block_history: int = 50
+
     class Config:
         env_file = ".env"
         case_sensitive = False
@@ -0,0 +1,5 @@
+"""Presence module."""
+from app.presence.hyperloglog import HyperLogLog
+from app.presence.tracker import PresenceTracker
+
+__all__ = ["HyperLogLog", "PresenceTracker"]
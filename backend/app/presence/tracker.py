@@ -0,0 +1,175 @@
+"""
+Presence tracking with bucketed expiry.
+Follows Single Responsibility Principle - tracks who is viewing which poll only.
+"""
+import math
+import time
+from collections import OrderedDict, defaultdict
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+from app.presence.hyperloglog import HyperLogLog
+
+Key = Tuple[str, Optional[str]]
+
+
+class PresenceTracker:
+    """
+    Expiring set of ``(user_id, poll_id)`` heartbeats.
+
+    Entries live in one-second (``bucket_seconds``) buckets of a timing
+    wheel; a heartbeat moves its entry to the current bucket and whole
+    buckets are dropped once they are older than ``ttl_seconds``, so expiry
+    only touches entries that actually expired. Per-poll viewer counts and
+    the global distinct-user count are maintained incrementally and read in
+    O(1). At most ``max_entries`` entries are kept; beyond that the oldest
+    are evicted early.
+
+    When ``hll_precision`` is set, each poll also gets a HyperLogLog of
+    every user that has ever viewed it, giving a fixed-memory estimate of
+    its total audience. At most ``max_audiences`` estimators are kept, least
+    recently viewed polls are evicted first.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 30,
+        bucket_seconds: float = 1,
+        max_entries: int = 100000,
+        hll_precision: Optional[int] = 10,
+        max_audiences: int = 10000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.bucket_seconds = bucket_seconds
+        self.wheel_size = max(1, math.ceil(ttl_seconds / bucket_seconds))
+        self.max_entries = max_entries
+        self.hll_precision = hll_precision
+        self.max_audiences = max_audiences
+        self._clock = clock
+        self._buckets: "OrderedDict[int, Set[Key]]" = OrderedDict()
+        self._entries: Dict[Key, int] = {}
+        self._poll_counts: Dict[str, int] = defaultdict(int)
+        self._user_refs: Dict[str, int] = defaultdict(int)
+        self._audiences: "OrderedDict[str, HyperLogLog]" = OrderedDict()
+        self._total_audience = HyperLogLog(hll_precision) if hll_precision else None
+
+    def _current_bucket(self) -> int:
+        return int(self._clock() // self.bucket_seconds)
+
+    def _expire(self, current: int) -> None:
+        threshold = current - self.wheel_size
+        while self._buckets:
+            oldest = next(iter(self._buckets))
+            if oldest > threshold:
+                break
+            for key in self._buckets.popitem(last=False)[1]:
+                self._drop(key)
+
+    def _drop(self, key: Key) -> None:
+        del self._entries[key]
+        user_id, poll_id = key
+        if poll_id is not None:
+            self._poll_counts[poll_id] -= 1
+            if not self._poll_counts[poll_id]:
+                del self._poll_counts[poll_id]
+        self._user_refs[user_id] -= 1
+        if not self._user_refs[user_id]:
+            del self._user_refs[user_id]
+
+    def _evict_oldest(self) -> None:
+        while True:
+            oldest, keys = next(iter(self._buckets.items()))
+            if keys:
+                self._drop(keys.pop())
+                return
+            del self._buckets[oldest]
+
+    def heartbeat(self, user_id: str, poll_ids: Iterable[str] = ()) -> None:
+        """Mark a user as online, and as viewing each of ``poll_ids``, for the next TTL."""
+        current = self._current_bucket()
+        self._expire(current)
+
+        keys = [(user_id, poll_id) for poll_id in poll_ids] or [(user_id, None)]
+        for key in keys:
+            previous = self._entries.get(key)
+            if previous == current:
+                continue
+            if previous is not None:
+                self._buckets[previous].discard(key)
+            else:
+                if len(self._entries) >= self.max_entries:
+                    self._evict_oldest()
+                poll_id = key[1]
+                if poll_id is not None:
+                    self._poll_counts[poll_id] += 1
+                    self._record_audience(poll_id, user_id)
+                self._user_refs[user_id] += 1
+            self._entries[key] = current
+            self._buckets.setdefault(current, set()).add(key)
+
+    def _record_audience(self, poll_id: str, user_id: str) -> None:
+        if self._total_audience is None:
+            return
+        audience = self._audiences.get(poll_id)
+        if audience is None:
+            audience = self._audiences[poll_id] = HyperLogLog(self.hll_precision)
+            while len(self._audiences) > self.max_audiences:
+                self._audiences.popitem(last=False)
+        else:
+            self._audiences.move_to_end(poll_id)
+        audience.add(user_id)
+        self._total_audience.add(user_id)
+
+    def leave(self, user_id: str, poll_ids: Iterable[str] = ()) -> None:
+        """Remove presence entries before they expire."""
+        keys = [(user_id, poll_id) for poll_id in poll_ids] or [(user_id, None)]
+        for key in keys:
+            bucket = self._entries.get(key)
+            if bucket is not None:
+                self._buckets[bucket].discard(key)
+                self._drop(key)
+
+    def forget_poll(self, poll_id: str) -> None:
+        """Drop a deleted poll's audience estimator."""
+        self._audiences.pop(poll_id, None)
+
+    def audience_count(self) -> int:
+        """Number of per-poll audience estimators held."""
+        return len(self._audiences)
+
+    def viewers(self, poll_id: str) -> int:
+        """Users currently viewing a poll."""
+        self._expire(self._current_bucket())
+        return self._poll_counts.get(poll_id, 0)
+
+    def active_users(self) -> int:
+        """Distinct users with any live heartbeat."""
+        self._expire(self._current_bucket())
+        return len(self._user_refs)
+
+    def all_viewers(self) -> Dict[str, int]:
+        """Viewer counts of every poll that currently has viewers."""
+        self._expire(self._current_bucket())
+        return dict(self._poll_counts)
+
+    def audience(self, poll_id: str) -> Optional[int]:
+        """Estimated distinct users that have ever viewed a poll, or None if HLL is disabled."""
+        if self._total_audience is None:
+            return None
+        audience = self._audiences.get(poll_id)
+        return audience.count() if audience else 0
+
+    def total_audience(self) -> Optional[int]:
+        """Estimated distinct users that have viewed any poll, or None if HLL is disabled."""
+        return self._total_audience.count() if self._total_audience else None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        self._buckets.clear()
+        self._entries.clear()
+        self._poll_counts.clear()
+        self._user_refs.clear()
+        self._audiences.clear()
+        if self._total_audience is not None:
+            self._total_audience = HyperLogLog(self.hll_precision)
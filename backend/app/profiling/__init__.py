@@ -0,0 +1,6 @@
+"""Profiling module."""
+from app.profiling.sampler import SamplingProfiler
+from app.profiling.loop_monitor import LoopBlockMonitor
+from app.profiling.request_profiler import RequestProfiler
+
+__all__ = ["SamplingProfiler", "LoopBlockMonitor", "RequestProfiler"]
@@ -0,0 +1,86 @@
+"""
+Event-loop blocking detector.
+Follows Single Responsibility Principle - reports synchronous calls that stall the loop only.
+"""
+import asyncio
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, List, Optional
+
+from app.profiling.sampler import _frame_label, _walk_stack
+
+
+class LoopBlockMonitor:
+    """
+    Detects event-loop stalls with a heartbeat coroutine and a watchdog thread.
+
+    The coroutine stamps a heartbeat every ``interval`` seconds. When the
+    watchdog sees a heartbeat older than ``threshold`` it captures the loop
+    thread's stack, which points at the synchronous call holding the loop.
+    Once the loop wakes up the coroutine records how long the stall lasted.
+    Only the most recent ``history`` events are kept.
+    """
+
+    def __init__(self, threshold_ms: float = 100, history: int = 50):
+        self.threshold = threshold_ms / 1000
+        self.interval = min(self.threshold / 2, 0.05)
+        self.events: Deque[dict] = deque(maxlen=history)
+        self._heartbeat = time.monotonic()
+        self._pending_stack: Optional[List[str]] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop_event = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start monitoring the running event loop."""
+        if self.running:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop_event.clear()
+        self._task = asyncio.get_running_loop().create_task(self._beat())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="quickpoll-loop-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _beat(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            self._heartbeat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = time.monotonic() - expected
+            if lag >= self.threshold:
+                self.events.append({
+                    "detected_at": datetime.now().isoformat(),
+                    "blocked_ms": round(lag * 1000, 2),
+                    "stack": self._pending_stack or [],
+                })
+            self._pending_stack = None
+
+    def _watch(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            stalled = time.monotonic() - self._heartbeat
+            if stalled < self.threshold or self._pending_stack is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                self._pending_stack = [_frame_label(f) for f in _walk_stack(frame)]
+
+    def report(self, min_ms: float = 0) -> List[dict]:
+        """Return recorded stalls at or above ``min_ms``, most recent first."""
+        return [e for e in reversed(self.events) if e["blocked_ms"] >= min_ms]
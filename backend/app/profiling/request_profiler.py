@@ -0,0 +1,78 @@
+"""
+Per-request cProfile capture.
+Follows Single Responsibility Principle - profiles individual opted-in requests only.
+"""
+import cProfile
+import io
+import pstats
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+SORT_KEYS = ("cumulative", "tottime", "calls", "ncalls")
+
+
+class RequestProfiler:
+    """
+    Runs cProfile around a single request and keeps the last ``history`` results.
+
+    Only one request is profiled at a time; concurrent opt-ins are skipped so
+    the profiler can never stack up. Coroutines interleaved on the loop while
+    the request is in flight are included in its profile.
+    """
+
+    def __init__(self, history: int = 20):
+        self.history = history
+        self._busy = threading.Lock()
+        self._profiles: "OrderedDict[str, dict]" = OrderedDict()
+
+    def begin(self) -> Optional[cProfile.Profile]:
+        """Enable a profiler, or return None if another request holds it."""
+        if not self._busy.acquire(blocking=False):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            self._busy.release()
+            return None
+        return profiler
+
+    def finish(self, profiler: cProfile.Profile, method: str, path: str, duration_ms: float) -> str:
+        """Disable the profiler, store its stats and return the profile id."""
+        try:
+            profiler.disable()
+        finally:
+            self._busy.release()
+
+        profile_id = uuid.uuid4().hex
+        self._profiles[profile_id] = {
+            "id": profile_id,
+            "method": method,
+            "path": path,
+            "duration_ms": round(duration_ms, 2),
+            "captured_at": datetime.now().isoformat(),
+            "stats": pstats.Stats(profiler),
+        }
+        while len(self._profiles) > self.history:
+            self._profiles.popitem(last=False)
+        return profile_id
+
+    def list(self) -> list:
+        return [
+            {k: v for k, v in p.items() if k != "stats"}
+            for p in reversed(self._profiles.values())
+        ]
+
+    def render(self, profile_id: str, sort: str = "cumulative", limit: int = 50) -> Optional[str]:
+        """Format a stored profile as pstats text."""
+        profile = self._profiles.get(profile_id)
+        if profile is None:
+            return None
+        out = io.StringIO()
+        stats = profile["stats"]
+        stats.stream = out
+        stats.sort_stats(sort if sort in SORT_KEYS else "cumulative").print_stats(limit)
+        return out.getvalue()
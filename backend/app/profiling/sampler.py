@@ -0,0 +1,171 @@
+"""
+Wall-clock sampling profiler.
+Follows Single Responsibility Principle - collects and exports stack samples only.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+Frame = Tuple[str, str, int]
+TRUNCATED_FRAME: Frame = ("[truncated]", "", 0)
+
+
+def _walk_stack(frame) -> Tuple[Frame, ...]:
+    """Return the stack of a frame as a root-first tuple of (function, file, line)."""
+    stack: List[Frame] = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+class SamplingProfiler:
+    """
+    Periodically snapshots the stacks of every thread via ``sys._current_frames``.
+
+    Sampling happens on a daemon thread, so the profiled code is never
+    instrumented and the overhead is bounded by the sampling interval.
+    The number of distinct stacks kept is capped to bound memory.
+    """
+
+    def __init__(self, max_stacks: int = 5000):
+        self.max_stacks = max_stacks
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._samples: Counter = Counter()
+        self._interval = 0.01
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+        self._sample_count = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration_seconds: float, interval_ms: float = 10) -> bool:
+        """Start a sampling session. Returns False if one is already running."""
+        with self._lock:
+            if self.running:
+                return False
+            self._samples = Counter()
+            self._sample_count = 0
+            self._interval = max(interval_ms, 1) / 1000
+            self._started_at = time.time()
+            self._finished_at = None
+            self._stop_event.clear()
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(duration_seconds,),
+                name="quickpoll-sampler",
+                daemon=True,
+            )
+            self._thread.start()
+            return True
+
+    def stop(self) -> None:
+        """Stop the current session and wait for the sampler thread to exit."""
+        self._stop_event.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _run(self, duration_seconds: float) -> None:
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + duration_seconds
+        while not self._stop_event.is_set() and time.monotonic() < deadline:
+            self._take_sample(own_id)
+            self._stop_event.wait(self._interval)
+        self._finished_at = time.time()
+
+    def _take_sample(self, own_id: int) -> None:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        stacks = []
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            root: Frame = (f"thread:{names.get(thread_id, thread_id)}", "", 0)
+            stacks.append((root,) + _walk_stack(frame))
+        with self._lock:
+            for stack in stacks:
+                if stack not in self._samples and len(self._samples) >= self.max_stacks:
+                    stack = (stack[0], TRUNCATED_FRAME)
+                self._samples[stack] += 1
+            self._sample_count += 1
+
+    def _snapshot(self) -> Dict[Tuple[Frame, ...], int]:
+        with self._lock:
+            return dict(self._samples)
+
+    def summary(self) -> dict:
+        """Describe the current or last session."""
+        end = self._finished_at or time.time()
+        return {
+            "running": self.running,
+            "started_at": self._started_at,
+            "duration_seconds": round(end - self._started_at, 3) if self._started_at else 0,
+            "interval_ms": self._interval * 1000,
+            "samples": self._sample_count,
+            "distinct_stacks": len(self._samples),
+        }
+
+    def has_samples(self) -> bool:
+        return bool(self._samples)
+
+    def to_collapsed(self) -> str:
+        """Export samples in Brendan Gregg's collapsed-stack format."""
+        lines = []
+        for stack, count in sorted(self._snapshot().items(), key=lambda item: -item[1]):
+            names = ";".join(_frame_label(frame) for frame in stack)
+            lines.append(f"{names} {count}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def to_speedscope(self, name: str = "QuickPoll") -> dict:
+        """Export samples as a speedscope sampled profile."""
+        frame_index: Dict[Frame, int] = {}
+        frames: List[dict] = []
+        samples: List[List[int]] = []
+        weights: List[float] = []
+
+        for stack, count in self._snapshot().items():
+            indices = []
+            for frame in stack:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    entry = {"name": frame[0]}
+                    if frame[1]:
+                        entry["file"] = frame[1]
+                        entry["line"] = frame[2]
+                    frames.append(entry)
+                indices.append(frame_index[frame])
+            samples.append(indices)
+            weights.append(round(count * self._interval, 6))
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "quickpoll-sampler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": round(sum(weights), 6),
+                "samples": samples,
+                "weights": weights,
+            }],
+        }
+
+
+def _frame_label(frame: Frame) -> str:
+    function, filename, _ = frame
+    if not filename:
+        return function
+    return f"{os.path.basename(filename)}:{function}"
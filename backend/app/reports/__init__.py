@@ -0,0 +1,5 @@
+"""Reports module. matplotlib and reportlab are only imported inside worker processes."""
+from app.reports.pool import ReportRenderer
+from app.reports.renderers import RENDERERS
+
+__all__ = ["ReportRenderer", "RENDERERS"]
@@ -0,0 +1,103 @@
+"""
+Process-pool report rendering.
+Follows Single Responsibility Principle - schedules, deduplicates and caches report renders only.
+"""
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from fastapi import HTTPException
+
+from app.cache import SingleFlight, TTLCache
+from app.reports.renderers import RENDERERS, init_worker, ping
+
+
+class ReportRenderer:
+    """
+    Renders reports in a bounded pool of worker processes.
+
+    Rendering never runs on the event loop. Results are cached per
+    ``(poll_id, version, kind)`` so a report is rendered at most once per
+    poll version, and concurrent requests for the same report share one
+    render. Once ``max_pending`` renders are queued further requests get 503.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 32, cache_ttl: float = 300, cache_entries: int = 128):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._cache = TTLCache(cache_ttl, max_entries=cache_entries)
+        self._single_flight = SingleFlight()
+        self._warm_up_task: Optional[asyncio.Task] = None
+        self.stats = {"renders": 0, "cache_hits": 0, "warm_up": "not started"}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+            )
+        return self._executor
+
+    async def warm_up(self) -> None:
+        """Start every worker so the initializer has run before the first request."""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        await asyncio.gather(*(loop.run_in_executor(executor, ping) for _ in range(self.max_workers)))
+
+    def start_warm_up(self) -> None:
+        """Run ``warm_up`` in the background, recording its outcome in ``stats``."""
+        self.stats["warm_up"] = "running"
+        self._warm_up_task = asyncio.get_running_loop().create_task(self.warm_up())
+        self._warm_up_task.add_done_callback(self._record_warm_up)
+
+    def _record_warm_up(self, task: asyncio.Task) -> None:
+        if task.cancelled():
+            self.stats["warm_up"] = "cancelled"
+        elif task.exception() is not None:
+            self.stats["warm_up"] = f"failed: {task.exception()!r}"
+        else:
+            self.stats["warm_up"] = "done"
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def render(self, kind: str, poll_id: str, version: int, snapshot: dict) -> bytes:
+        """Return the rendered report, from cache when this poll version was already rendered."""
+        key = (poll_id, version, kind)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            return cached
+        # In-flight keys are registered synchronously by SingleFlight.do, so a
+        # burst arriving in one loop tick is counted before any render starts.
+        if key not in self._single_flight and len(self._single_flight) >= self.max_pending:
+            raise HTTPException(status_code=503, detail="Report renderer busy, try again shortly")
+        return await self._single_flight.do(key, lambda: self._render(key, kind, snapshot))
+
+    async def _render(self, key: tuple, kind: str, snapshot: dict) -> bytes:
+        self.stats["renders"] += 1
+        try:
+            loop = asyncio.get_running_loop()
+            data = await loop.run_in_executor(self._get_executor(), RENDERERS[kind], snapshot)
+        except BrokenProcessPool:
+            self.shutdown()
+            raise HTTPException(status_code=503, detail="Report renderer restarting, try again shortly")
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Report rendering failed: {str(e)}")
+        self._cache.set(key, data)
+        return data
+
+    def get_stats(self) -> dict:
+        return {
+            **self.stats,
+            "coalesced": self._single_flight.shared,
+            "pending": len(self._single_flight),
+            "cached": len(self._cache),
+            "workers": self.max_workers,
+        }
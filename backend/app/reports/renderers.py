@@ -0,0 +1,141 @@
+"""
+Report renderers executed inside worker processes.
+Follows Single Responsibility Principle - turns poll snapshots into PNG/PDF bytes only.
+
+Everything here must stay picklable and free of event-loop state: functions
+receive a plain ``snapshot`` dict and return bytes.
+"""
+from io import BytesIO
+
+_warmed = False
+
+
+def init_worker() -> None:
+    """
+    Process-pool initializer: select the Agg backend, build the font cache
+    and render one throwaway chart so the first real request is fast.
+    """
+    global _warmed
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from matplotlib import font_manager
+    from reportlab.pdfgen import canvas  # noqa: F401
+    from reportlab.lib.utils import ImageReader  # noqa: F401
+
+    font_manager.findfont("DejaVu Sans")
+    fig, ax = plt.subplots(figsize=(1, 1))
+    ax.barh(["warm-up"], [1])
+    fig.savefig(BytesIO(), format="png")
+    plt.close(fig)
+    _warmed = True
+
+
+def ping() -> bool:
+    """No-op task used to start workers ahead of the first request."""
+    return _warmed
+
+
+def render_chart_png(snapshot: dict) -> bytes:
+    """
+    Render poll results as a horizontal bar chart.
+
+    Bars are placed by position so options with identical text stay separate,
+    and user text is drawn literally rather than parsed as mathtext.
+    """
+    if not _warmed:
+        init_worker()
+    import matplotlib.pyplot as plt
+
+    labels = [option["text"] for option in snapshot["options"]]
+    votes = [option["votes"] for option in snapshot["options"]]
+    positions = range(len(labels))
+
+    fig, ax = plt.subplots(figsize=(8, 0.6 * len(labels) + 1.5), dpi=100)
+    try:
+        bars = ax.barh(positions, votes, color="#667eea")
+        ax.set_yticks(positions, labels, parse_math=False)
+        ax.invert_yaxis()
+        ax.set_title(snapshot["question"], fontsize=12, wrap=True, parse_math=False)
+        ax.set_xlabel("Votes")
+        ax.bar_label(bars, padding=3)
+        ax.spines[["top", "right"]].set_visible(False)
+        fig.tight_layout()
+
+        buffer = BytesIO()
+        fig.savefig(buffer, format="png")
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
+
+
+PDF_MARGIN = 50
+PDF_ROW_HEIGHT = 18
+PDF_MIN_CHART_HEIGHT = 150
+
+
+def render_pdf(snapshot: dict) -> bytes:
+    """
+    Render a PDF results report with a results table and chart.
+
+    The table continues on new pages as needed, and the chart starts a fresh
+    page when less than ``PDF_MIN_CHART_HEIGHT`` points are left.
+    """
+    if not _warmed:
+        init_worker()
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfgen import canvas
+
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+    top = height - 60
+    y = top
+
+    def table_header(y: float) -> float:
+        pdf.setFont("Helvetica-Bold", 11)
+        pdf.drawString(PDF_MARGIN, y, "Option")
+        pdf.drawRightString(width - 140, y, "Votes")
+        pdf.drawRightString(width - PDF_MARGIN, y, "Percentage")
+        pdf.setFont("Helvetica", 11)
+        return y
+
+    pdf.setTitle(snapshot["question"])
+    pdf.setFont("Helvetica-Bold", 16)
+    pdf.drawString(PDF_MARGIN, y, snapshot["question"][:90])
+    y -= 24
+    pdf.setFont("Helvetica", 10)
+    pdf.drawString(PDF_MARGIN, y, f"Total votes: {snapshot['total_votes']}")
+    y -= 30
+
+    total = snapshot["total_votes"] or 1
+    y = table_header(y)
+    for option in snapshot["options"]:
+        y -= PDF_ROW_HEIGHT
+        if y < PDF_MARGIN:
+            pdf.showPage()
+            y = table_header(top) - PDF_ROW_HEIGHT
+        pdf.drawString(PDF_MARGIN, y, option["text"][:70])
+        pdf.drawRightString(width - 140, y, str(option["votes"]))
+        pdf.drawRightString(width - PDF_MARGIN, y, f"{option['votes'] / total * 100:.1f}%")
+
+    y -= 30
+    if y - PDF_MARGIN < PDF_MIN_CHART_HEIGHT:
+        pdf.showPage()
+        y = top
+    chart = ImageReader(BytesIO(render_chart_png(snapshot)))
+    chart_width, chart_height = chart.getSize()
+    scale = min((width - 2 * PDF_MARGIN) / chart_width, (y - PDF_MARGIN) / chart_height, 1)
+    pdf.drawImage(chart, PDF_MARGIN, y - chart_height * scale, chart_width * scale, chart_height * scale)
+
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+RENDERERS = {
+    "png": render_chart_png,
+    "pdf": render_pdf,
+}
@@ -0,0 +1,17 @@
+"""Services module. Heavy third-party imports are deferred to first use."""
+from app.services.ai import StubBackend, generate_ai_poll, get_cache_stats, set_ai_backend
+from app.services.qr import generate_qr_code
+from app.services.webhooks import send_webhooks
+from app.services.warmup import OPTIONAL_SUBSYSTEMS, warm_up, warmup_status
+
+__all__ = [
+    "StubBackend",
+    "generate_ai_poll",
+    "get_cache_stats",
+    "set_ai_backend",
+    "generate_qr_code",
+    "send_webhooks",
+    "OPTIONAL_SUBSYSTEMS",
+    "warm_up",
+    "warmup_status",
+]
@@ -0,0 +1,141 @@
+"""
+AI poll generation service.
+Follows Single Responsibility Principle - turns topics into poll drafts only.
+"""
+import asyncio
+import copy
+import json
+from typing import Callable, Optional, Tuple
+
+from fastapi import HTTPException
+
+from app.cache import SingleFlight, TTLCache
+from app.config import settings
+
+PROMPT_TEMPLATE = """Generate a poll question and {num_options} answer options about: {topic}
+
+Format your response as JSON:
+{{
+    "question": "Your poll question here?",
+    "options": ["Option 1", "Option 2", "Option 3", "Option 4"]
+}}"""
+
+
+class OpenAIBackend:
+    """Generates polls with the OpenAI API through one pooled client."""
+
+    def __init__(self):
+        self._client = None
+        self.calls = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(getattr(settings, "openai_enabled", False) and getattr(settings, "openai_api_key", None))
+
+    def _get_client(self):
+        if self._client is None:
+            from openai import AsyncOpenAI  # deferred: large client library
+
+            self._client = AsyncOpenAI(api_key=settings.openai_api_key)
+        return self._client
+
+    async def generate(self, topic: str, num_options: int) -> dict:
+        self.calls += 1
+        response = await self._get_client().chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=[{"role": "user", "content": PROMPT_TEMPLATE.format(topic=topic, num_options=num_options)}],
+            temperature=0.7
+        )
+        return json.loads(response.choices[0].message.content)
+
+
+class StubBackend:
+    """Offline backend returning canned polls after ``latency_seconds``, for tests and benchmarks."""
+
+    enabled = True
+
+    def __init__(self, latency_seconds: float = 0.0):
+        self.latency_seconds = latency_seconds
+        self.calls = 0
+
+    async def generate(self, topic: str, num_options: int) -> dict:
+        self.calls += 1
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        return {
+            "question": f"What is your take on {topic}?",
+            "options": [f"{topic} option {i + 1}" for i in range(num_options)],
+        }
+
+
+_backend = None
+_cache = TTLCache(settings.cache_ttl, max_entries=settings.ai_cache_max_entries)
+_single_flight = SingleFlight()
+cache_stats = {"hits": 0, "misses": 0}
+
+
+def get_ai_backend():
+    """Return the configured backend, creating it on first use."""
+    global _backend
+    if _backend is None:
+        _backend = StubBackend() if settings.ai_backend == "stub" else OpenAIBackend()
+    return _backend
+
+
+def set_ai_backend(backend: Optional[object]) -> None:
+    """Swap the backend and drop cached results. ``None`` restores the configured one."""
+    global _backend
+    _backend = backend
+    _cache.clear()
+    cache_stats.update(hits=0, misses=0)
+    _single_flight.shared = 0
+
+
+def normalize_topic(topic: str) -> str:
+    """Collapse case, whitespace and trailing punctuation so equivalent topics share a cache entry."""
+    return " ".join(topic.split()).casefold().strip(" ?!.")
+
+
+def get_cache_stats() -> dict:
+    return {
+        **cache_stats,
+        "coalesced": _single_flight.shared,
+        "entries": len(_cache),
+        "upstream_calls": getattr(_backend, "calls", 0),
+    }
+
+
+async def _generate(backend, key: Tuple[str, int], topic: str, num_options: int) -> dict:
+    try:
+        result = await backend.generate(topic, num_options)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"AI generation failed: {str(e)}")
+    _cache.set(key, result)
+    return result
+
+
+async def generate_ai_poll(
+    topic: str, num_options: int = 4, before_upstream: Optional[Callable[[], None]] = None
+) -> dict:
+    """
+    Generate poll question and options for a topic.
+
+    Results are cached per normalized topic for ``settings.cache_ttl`` seconds,
+    and concurrent requests for the same topic share one upstream call.
+    Failures are not cached. ``before_upstream`` is called only when this
+    request would start a new upstream call, and may raise to refuse it.
+    """
+    backend = get_ai_backend()
+    if not backend.enabled:
+        raise HTTPException(status_code=503, detail="AI features not enabled")
+
+    key = (normalize_topic(topic), num_options)
+    result = _cache.get(key)
+    if result is not None:
+        cache_stats["hits"] += 1
+    else:
+        if before_upstream is not None and key not in _single_flight:
+            before_upstream()
+        cache_stats["misses"] += 1
+        result = await _single_flight.do(key, lambda: _generate(backend, key, topic.strip(), num_options))
+    return copy.deepcopy(result)
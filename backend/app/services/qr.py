@@ -0,0 +1,23 @@
+"""
+QR code service.
+Follows Single Responsibility Principle - renders poll QR codes only.
+"""
+import base64
+from io import BytesIO
+
+
+def generate_qr_code(poll_id: str) -> str:
+    """Generate QR code for poll as base64 data URL."""
+    import qrcode  # deferred: pulls in Pillow
+
+    poll_url = f"http://localhost:3000"
+    qr = qrcode.QRCode(version=1, box_size=10, border=4)
+    qr.add_data(poll_url)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white")
+
+    buffer = BytesIO()
+    img.save(buffer, format="PNG")
+    buffer.seek(0)
+    img_base64 = base64.b64encode(buffer.getvalue()).decode()
+    return f"data:image/png;base64,{img_base64}"
@@ -0,0 +1,39 @@
+"""
+Background warm-up of optional subsystems.
+Follows Single Responsibility Principle - preloads deferred imports only.
+"""
+import importlib
+import time
+from typing import Dict, Tuple
+
+OPTIONAL_SUBSYSTEMS: Dict[str, Tuple[str, ...]] = {
+    "qr": ("qrcode", "PIL.Image", "PIL.PngImagePlugin"),
+    "webhooks": ("aiohttp",),
+    "ai": ("openai",),
+}
+
+warmup_status: Dict[str, dict] = {}
+
+
+def warm_up(subsystems: Tuple[str, ...] = tuple(OPTIONAL_SUBSYSTEMS)) -> Dict[str, dict]:
+    """
+    Import the modules behind each optional subsystem.
+
+    Meant to run off the event loop after startup so the first request
+    that needs a subsystem does not pay its import cost. Missing optional
+    packages are recorded rather than raised.
+    """
+    for name in subsystems:
+        start = time.perf_counter()
+        try:
+            for module in OPTIONAL_SUBSYSTEMS[name]:
+                importlib.import_module(module)
+            error = None
+        except ImportError as e:
+            error = str(e)
+        warmup_status[name] = {
+            "loaded": error is None,
+            "import_ms": round((time.perf_counter() - start) * 1000, 2),
+            "error": error,
+        }
+    return warmup_status
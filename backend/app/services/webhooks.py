@@ -0,0 +1,42 @@
+"""
+Webhook delivery service.
+Follows Single Responsibility Principle - posts poll events to chat platforms only.
+"""
+from typing import List
+
+
+async def send_webhooks(webhooks: List[dict], data: dict) -> None:
+    """Post a poll update to each registered Discord/Slack webhook."""
+    import aiohttp  # deferred: only needed once a webhook is registered
+
+    for webhook in webhooks:
+        try:
+            async with aiohttp.ClientSession() as session:
+                if webhook["platform"] == "discord":
+                    payload = {
+                        "content": f" New vote on poll: {data.get('poll_question', 'Unknown')}",
+                        "embeds": [{
+                            "title": "Poll Update",
+                            "description": f"Total votes: {data.get('total_votes', 0)}",
+                            "color": 5814783
+                        }]
+                    }
+                elif webhook["platform"] == "slack":
+                    payload = {
+                        "text": f" New vote on poll: {data.get('poll_question', 'Unknown')}",
+                        "blocks": [{
+                            "type": "section",
+                            "text": {
+                                "type": "mrkdwn",
+                                "text": f"*Poll Update*\nTotal votes: {data.get('total_votes', 0)}"
+                            }
+                        }]
+                    }
+                else:
+                    continue
+
+                async with session.post(webhook["webhook_url"], json=payload) as resp:
+                    if resp.status in (200, 204):
+                        print(f"Webhook sent successfully to {webhook['platform']}")
+        except Exception as e:
+            print(f"Webhook error: {e}")
@@ -0,0 +1 @@
+"""Benchmarks for the QuickPoll backend. Run with ``python -m benchmarks.<name>``."""
@@ -0,0 +1,40 @@
+"""
+AI generation cache benchmark against the offline stub backend.
+Fires concurrent bursts of repeated topics and reports upstream calls and wall time.
+
+Usage: python -m benchmarks.ai_cache [requests] [topics] [latency_ms]
+"""
+import asyncio
+import sys
+import time
+
+from app.services import StubBackend, generate_ai_poll, get_cache_stats, set_ai_backend
+
+
+async def run(requests: int = 200, topics: int = 10, latency_ms: float = 200) -> dict:
+    """Send ``requests`` concurrent generations spread over ``topics`` topics, twice."""
+    set_ai_backend(StubBackend(latency_seconds=latency_ms / 1000))
+    burst = [f"Topic {i % topics}" for i in range(requests)]
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(*(generate_ai_poll(topic) for topic in burst))
+        cold_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        await asyncio.gather(*(generate_ai_poll(topic.lower()) for topic in burst))
+        warm_ms = (time.perf_counter() - start) * 1000
+
+        return {"cold_ms": round(cold_ms, 1), "warm_ms": round(warm_ms, 1), **get_cache_stats()}
+    finally:
+        set_ai_backend(None)
+
+
+if __name__ == "__main__":
+    args = [float(a) for a in sys.argv[1:4]]
+    requests, topics, latency_ms = (args + [200, 10, 200][len(args):])
+    result = asyncio.run(run(int(requests), int(topics), latency_ms))
+    print(f"{int(requests) * 2} requests over {int(topics)} topics, stub latency {latency_ms:.0f} ms")
+    print(f"cold burst:      {result['cold_ms']:8.1f} ms")
+    print(f"cached burst:    {result['warm_ms']:8.1f} ms")
+    print(f"upstream calls:  {result['upstream_calls']}")
+    print(f"cache hits:      {result['hits']}  coalesced: {result['coalesced']}")
@@ -0,0 +1,71 @@
+"""
+Report rendering throughput benchmark.
+Renders charts for many polls while a probe coroutine measures event-loop lag,
+first inline on the loop and then through the process pool.
+
+Usage: python -m benchmarks.reports [polls] [workers]
+"""
+import asyncio
+import sys
+import time
+
+from app.reports import RENDERERS, ReportRenderer
+
+
+def _snapshot(i: int) -> dict:
+    options = [{"text": f"Option {j}", "votes": (i * 7 + j * 3) % 50} for j in range(4)]
+    return {"question": f"Benchmark poll {i}?", "total_votes": sum(o["votes"] for o in options), "options": options}
+
+
+async def _probe(stop: asyncio.Event, lags: list, interval: float = 0.01) -> None:
+    while not stop.is_set():
+        expected = time.perf_counter() + interval
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, time.perf_counter() - expected) * 1000)
+
+
+async def _measure(render_all) -> dict:
+    stop = asyncio.Event()
+    lags: list = []
+    probe = asyncio.ensure_future(_probe(stop, lags))
+    start = time.perf_counter()
+    count = await render_all()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe
+    return {
+        "renders_per_sec": round(count / elapsed, 1),
+        "max_loop_lag_ms": round(max(lags, default=elapsed * 1000), 1),
+    }
+
+
+async def run(polls: int = 40, workers: int = 2) -> dict:
+    snapshots = [_snapshot(i) for i in range(polls)]
+
+    async def inline():
+        for snapshot in snapshots:
+            RENDERERS["png"](snapshot)
+        return len(snapshots)
+
+    renderer = ReportRenderer(max_workers=workers, max_pending=polls)
+    await renderer.warm_up()
+
+    async def pooled():
+        await asyncio.gather(*(
+            renderer.render("png", str(i), 0, snapshot) for i, snapshot in enumerate(snapshots)
+        ))
+        return len(snapshots)
+
+    try:
+        return {"inline": await _measure(inline), "pool": await _measure(pooled)}
+    finally:
+        renderer.shutdown()
+
+
+if __name__ == "__main__":
+    polls = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    result = asyncio.run(run(polls, workers))
+    print(f"{polls} PNG charts, {workers} workers")
+    for mode, stats in result.items():
+        print(f"{mode:7s} {stats['renders_per_sec']:8.1f} renders/s   max loop lag {stats['max_loop_lag_ms']:8.1f} ms")
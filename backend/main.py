@@ -12,19 +12,28 @@ from enum import Enum
 import json
 import uuid
 import asyncio
+import time
 from collections import defaultdict, Counter
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
+from limits import parse as parse_limit
 import html
 import re
 import hashlib
-import qrcode
-from io import BytesIO
-import base64
-import aiohttp
+import hmac
 from app.config import settings
-import uvicorn
+from app.presence import PresenceTracker
+from app.profiling import SamplingProfiler, LoopBlockMonitor, RequestProfiler
+from app.reports import ReportRenderer
+from app.services import (
+    generate_ai_poll,
+    generate_qr_code,
+    get_cache_stats,
+    send_webhooks,
+    warm_up,
+    warmup_status,
+)
 
 app = FastAPI(
     title="QuickPoll API",
@@ -50,6 +59,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 polls_db: Dict[str, dict] = {}
@@ -59,8 +69,30 @@ reactions_db: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
 webhooks_db: Dict[str, List[dict]] = defaultdict(list)
 user_votes_db: Dict[str, Dict[str, str]] = defaultdict(dict)
 user_likes_db: Dict[str, Set[str]] = defaultdict(set)
-active_connections: Set[str] = set()
+user_polls_created: Dict[str, int] = defaultdict(int)
+user_state_versions: Dict[str, int] = defaultdict(int)
 request_times: List[float] = []
+SESSION_EPOCH = uuid.uuid4().hex[:8]
+
+sampling_profiler = SamplingProfiler(max_stacks=settings.profiler_max_stacks)
+request_profiler = RequestProfiler(history=settings.profiler_request_history)
+loop_monitor = LoopBlockMonitor(
+    threshold_ms=settings.loop_block_threshold_ms,
+    history=settings.loop_block_history,
+)
+presence = PresenceTracker(
+    ttl_seconds=settings.presence_ttl_seconds,
+    bucket_seconds=settings.presence_bucket_seconds,
+    max_entries=settings.presence_max_entries,
+    hll_precision=settings.presence_hll_precision if settings.presence_hll_enabled else None,
+    max_audiences=settings.presence_max_audiences,
+)
+report_renderer = ReportRenderer(
+    max_workers=settings.report_workers,
+    max_pending=settings.report_max_pending,
+    cache_ttl=settings.cache_ttl,
+    cache_entries=settings.report_cache_entries,
+)
 
 
 class PrivacyLevel(str, Enum):
@@ -126,6 +158,31 @@ class AnalyzeRequest(BaseModel):
     text: str
 
 
+class ProfilerStartRequest(BaseModel):
+    duration_seconds: float = Field(10, gt=0)
+    interval_ms: Optional[float] = Field(None, gt=0)
+
+
+class UserProfile(BaseModel):
+    userId: str
+    username: str
+    avatar: Optional[str] = None
+    bio: Optional[str] = None
+    pollsCreated: int = 0
+    totalVotes: int = 0
+
+
+class UpdateProfileRequest(BaseModel):
+    username: str
+    avatar: Optional[str] = None
+    bio: Optional[str] = None
+
+
+class PresenceHeartbeat(BaseModel):
+    userId: str
+    pollIds: List[str] = []
+
+
 class AdminStats(BaseModel):
     total_polls_today: int
     active_users_now: int
@@ -133,6 +190,7 @@ class AdminStats(BaseModel):
     avg_response_time_ms: float
     total_polls: int
     total_votes: int
+    unique_viewers_estimate: Optional[int] = None
 
 
 @app.middleware("http")
@@ -147,13 +205,86 @@ async def track_response_time(request: Request, call_next):
     return response
 
 
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    """Profile a single request with cProfile when an admin opts in via X-Profile-Request."""
+    if not request.headers.get("x-profile-request") or not is_admin_key(request.headers.get("x-admin-key")):
+        return await call_next(request)
+
+    profiler = request_profiler.begin()
+    if profiler is None:
+        response = await call_next(request)
+        response.headers["X-Profile-Status"] = "busy"
+        return response
+
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        profile_id = request_profiler.finish(
+            profiler,
+            request.method,
+            request.url.path,
+            (time.perf_counter() - start) * 1000,
+        )
+    response.headers["X-Profile-Id"] = profile_id
+    return response
+
+
+@app.on_event("startup")
+async def start_loop_monitor():
+    """Start reporting event-loop stalls."""
+    if settings.loop_monitor_enabled:
+        loop_monitor.start()
+
+
+@app.on_event("startup")
+async def warm_up_subsystems():
+    """Preload optional subsystems in the background so workers accept traffic immediately."""
+    if settings.warmup_enabled:
+        asyncio.get_running_loop().run_in_executor(None, warm_up)
+    if settings.report_prewarm:
+        report_renderer.start_warm_up()
+
+
+@app.on_event("shutdown")
+async def stop_profilers():
+    """Stop background profiling threads."""
+    loop_monitor.stop()
+    sampling_profiler.stop()
+    report_renderer.shutdown()
+
+
+def is_admin_key(key: Optional[str]) -> bool:
+    """Check a key against the configured admin API key."""
+    return key is not None and hmac.compare_digest(key, settings.admin_api_key)
+
+
 def verify_admin_key(x_admin_key: str = Header(None)):
     """Verify admin API key."""
-    if x_admin_key != settings.admin_api_key:
+    if not is_admin_key(x_admin_key):
         raise HTTPException(status_code=403, detail="Invalid admin key")
     return True
 
 
+def touch_user_state(user_id: str):
+    """Bump a user's session-state version after their votes, likes or profile change."""
+    user_state_versions[user_id] += 1
+
+
+def build_user_profile(user_id: str) -> UserProfile:
+    """Assemble a user's profile from O(1) per-user lookups."""
+    profile = users_db.get(user_id, {})
+    return UserProfile(
+        userId=user_id,
+        username=profile.get("username", user_id),
+        avatar=profile.get("avatar"),
+        bio=profile.get("bio"),
+        pollsCreated=user_polls_created.get(user_id, 0),
+        totalVotes=len(user_votes_db.get(user_id, {})),
+    )
+
+
 def sanitize_text(text: str) -> str:
     """Sanitize user input to prevent XSS."""
     text = html.escape(text)
@@ -169,87 +300,13 @@ def generate_fingerprint(request: Request, user_id: Optional[str] = None) -> str
     return hashlib.sha256(combined.encode()).hexdigest()
 
 
-def generate_qr_code(poll_id: str) -> str:
-    """Generate QR code for poll as base64 data URL."""
-    poll_url = f"http://localhost:3000"
-    qr = qrcode.QRCode(version=1, box_size=10, border=4)
-    qr.add_data(poll_url)
-    qr.make(fit=True)
-    img = qr.make_image(fill_color="black", back_color="white")
-
-    buffer = BytesIO()
-    img.save(buffer, format="PNG")
-    buffer.seek(0)
-    img_base64 = base64.b64encode(buffer.getvalue()).decode()
-    print(img_base64,"img_base64")
-    return f"data:image/png;base64,{img_base64}"
-
-
 async def trigger_webhooks(poll_id: str, event_type: str, data: dict):
     """Trigger webhooks for poll events."""
     if not getattr(settings, "webhook_enabled", False) or poll_id not in webhooks_db:
         return
 
-    for webhook in webhooks_db[poll_id]:
-        try:
-            async with aiohttp.ClientSession() as session:
-                if webhook["platform"] == "discord":
-                    payload = {
-                        "content": f" New vote on poll: {data.get('poll_question', 'Unknown')}",
-                        "embeds": [{
-                            "title": "Poll Update",
-                            "description": f"Total votes: {data.get('total_votes', 0)}",
-                            "color": 5814783
-                        }]
-                    }
-                elif webhook["platform"] == "slack":
-                    payload = {
-                        "text": f" New vote on poll: {data.get('poll_question', 'Unknown')}",
-                        "blocks": [{
-                            "type": "section",
-                            "text": {
-                                "type": "mrkdwn",
-                                "text": f"*Poll Update*\nTotal votes: {data.get('total_votes', 0)}"
-                            }
-                        }]
-                    }
-                else:
-                    continue
-
-                async with session.post(webhook["webhook_url"], json=payload) as resp:
-                    if resp.status in (200, 204):
-                        print(f"Webhook sent successfully to {webhook['platform']}")
-        except Exception as e:
-            print(f"Webhook error: {e}")
-
-
-async def generate_ai_poll(topic: str, num_options: int = 4) -> dict:
-    """Generate poll question and options using OpenAI."""
-    if not getattr(settings, "openai_enabled", False) or not getattr(settings, "openai_api_key", None):
-        raise HTTPException(status_code=503, detail="AI features not enabled")
-
-    try:
-        client = AsyncOpenAI(api_key=settings.openai_api_key)
-
-        prompt = f"""Generate a poll question and {num_options} answer options about: {topic}
+    await send_webhooks(webhooks_db[poll_id], data)
 
-Format your response as JSON:
-{{
-    "question": "Your poll question here?",
-    "options": ["Option 1", "Option 2", "Option 3", "Option 4"]
-}}"""
-
-        response = await client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7
-        )
-
-        content = response.choices[0].message.content
-        result = json.loads(content)
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"AI generation failed: {str(e)}")
 
 @app.get("/", tags=["Health"])
 async def root():
@@ -287,19 +344,115 @@ async def get_admin_stats(admin: bool = Depends(verify_admin_key)):
 
     return AdminStats(
         total_polls_today=polls_today,
-        active_users_now=len(active_connections),
+        active_users_now=presence.active_users(),
         most_popular_poll=most_popular,
         avg_response_time_ms=round(avg_response_time, 2),
         total_polls=len(polls_db),
-        total_votes=sum(len(votes) for votes in votes_db.values())
+        total_votes=sum(len(votes) for votes in votes_db.values()),
+        unique_viewers_estimate=presence.total_audience(),
     )
 
 
+@app.post("/api/admin/profiler/start", tags=["Admin"])
+async def start_profiler(
+    profiler_request: Optional[ProfilerStartRequest] = None,
+    admin: bool = Depends(verify_admin_key),
+):
+    """Start a sampling profiler session that stops itself after duration_seconds."""
+    profiler_request = profiler_request or ProfilerStartRequest()
+    duration = min(profiler_request.duration_seconds, settings.profiler_max_duration_seconds)
+    interval = max(
+        profiler_request.interval_ms or settings.profiler_default_interval_ms,
+        settings.profiler_min_interval_ms,
+    )
+    if not sampling_profiler.start(duration, interval):
+        raise HTTPException(status_code=409, detail="Profiler already running")
+    return sampling_profiler.summary()
+
+
+@app.post("/api/admin/profiler/stop", tags=["Admin"])
+async def stop_profiler(admin: bool = Depends(verify_admin_key)):
+    """Stop the sampling profiler early."""
+    sampling_profiler.stop()
+    return sampling_profiler.summary()
+
+
+@app.get("/api/admin/profiler/profile", tags=["Admin"])
+async def get_profile(
+    format: Literal["collapsed", "speedscope"] = "collapsed",
+    admin: bool = Depends(verify_admin_key),
+):
+    """Download the current or last sampling profile."""
+    if not sampling_profiler.has_samples():
+        raise HTTPException(status_code=404, detail="No profile recorded")
+
+    if format == "speedscope":
+        return Response(
+            content=json.dumps(sampling_profiler.to_speedscope()),
+            media_type="application/json",
+            headers={"Content-Disposition": "attachment; filename=profile.speedscope.json"},
+        )
+    return Response(content=sampling_profiler.to_collapsed(), media_type="text/plain")
+
+
+@app.get("/api/admin/profiler/requests", tags=["Admin"])
+async def list_request_profiles(admin: bool = Depends(verify_admin_key)):
+    """List recently profiled requests."""
+    return request_profiler.list()
+
+
+@app.get("/api/admin/profiler/requests/{profile_id}", tags=["Admin"])
+async def get_request_profile(
+    profile_id: str,
+    sort: str = "cumulative",
+    limit: int = 50,
+    admin: bool = Depends(verify_admin_key),
+):
+    """Get cProfile stats for a profiled request."""
+    report = request_profiler.render(profile_id, sort, limit)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return Response(content=report, media_type="text/plain")
+
+
+@app.get("/api/admin/profiler/blocking", tags=["Admin"])
+async def get_blocking_calls(min_ms: float = 0, admin: bool = Depends(verify_admin_key)):
+    """Report synchronous calls that blocked the event loop."""
+    return {
+        "enabled": loop_monitor.running,
+        "threshold_ms": loop_monitor.threshold * 1000,
+        "events": loop_monitor.report(min_ms),
+    }
+
+
+@app.get("/api/admin/subsystems", tags=["Admin"])
+async def get_subsystems(admin: bool = Depends(verify_admin_key)):
+    """Report which optional subsystems have been warmed up."""
+    return warmup_status
+
+
+@app.get("/api/admin/ai/cache", tags=["Admin"])
+async def get_ai_cache_stats(admin: bool = Depends(verify_admin_key)):
+    """Report AI generation cache hits, coalesced requests and upstream calls."""
+    return get_cache_stats()
+
+
+@app.get("/api/admin/reports", tags=["Admin"])
+async def get_report_stats(admin: bool = Depends(verify_admin_key)):
+    """Report renderer pool and cache statistics."""
+    return report_renderer.get_stats()
+
+
 @app.post("/api/ai/generate-poll", tags=["AI"])
-@limiter.limit("5/minute")
+@limiter.limit(getattr(settings, "rate_limit_ai_cached", "60/minute"))
 async def ai_generate_poll(request: Request, ai_request: AIGenerateRequest):
-    """Generate poll using AI."""
-    result = await generate_ai_poll(ai_request.topic, ai_request.num_options)
+    """Generate poll using AI. Only calls that reach the upstream API count against the tight limit."""
+    def check_upstream_limit():
+        limit = parse_limit(getattr(settings, "rate_limit_ai_generate", "5/minute"))
+        if limiter.enabled and not limiter.limiter.hit(limit, "ai_generate_upstream", get_remote_address(request)):
+            raise HTTPException(status_code=429, detail=f"Rate limit exceeded: {limit}")
+
+    result = await generate_ai_poll(ai_request.topic, ai_request.num_options, before_upstream=check_upstream_limit)
     return result
 
 
@@ -342,6 +495,10 @@ async def create_poll(request: Request, poll_request: CreatePollRequest):
 
     polls_db[poll_id] = poll_dict
 
+    if poll_request.creator_id:
+        user_polls_created[poll_request.creator_id] += 1
+        touch_user_state(poll_request.creator_id)
+
     return Poll(**poll_dict)
 
 
@@ -434,6 +591,7 @@ async def vote_on_poll(request: Request, poll_id: str, vote_request: VoteRequest
         raise HTTPException(status_code=400, detail="Invalid option")
 
     poll["total_votes"] += 1
+    poll["version"] = poll.get("version", 0) + 1
 
     vote_record = {
         "option_id": vote_request.option_id,
@@ -446,6 +604,7 @@ async def vote_on_poll(request: Request, poll_id: str, vote_request: VoteRequest
     # Track user vote for this poll
     if vote_request.user_id:
         user_votes_db[vote_request.user_id][poll_id] = vote_request.option_id
+        touch_user_state(vote_request.user_id)
 
     await trigger_webhooks(poll_id, "vote", {
         "poll_question": poll["question"],
@@ -469,6 +628,54 @@ async def get_user_likes(request: Request, user_id: str):
     return list(user_likes_db.get(user_id, set()))
 
 
+@app.get("/api/users/{user_id}/session", tags=["User"])
+@limiter.limit("100/minute")
+async def get_user_session(request: Request, response: Response, user_id: str):
+    """
+    Get a user's votes, likes and profile in one request.
+
+    The response carries an ETag; clients that send it back in If-None-Match
+    get an empty 304 until the user's state changes.
+    """
+    etag = f'W/"{SESSION_EPOCH}-{user_state_versions.get(user_id, 0)}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    return {
+        "votes": user_votes_db.get(user_id, {}),
+        "likes": list(user_likes_db.get(user_id, set())),
+        "profile": build_user_profile(user_id),
+    }
+
+
+@app.get("/api/users/{user_id}/profile", tags=["User"])
+async def get_user_profile(user_id: str):
+    """Get a user's profile."""
+    return build_user_profile(user_id)
+
+
+@app.put("/api/users/{user_id}/profile", tags=["User"])
+@limiter.limit(getattr(settings, "rate_limit_profile_update", "10/minute"))
+async def update_user_profile(request: Request, user_id: str, profile_request: UpdateProfileRequest):
+    """Update a user's profile."""
+    username = sanitize_text(profile_request.username)
+    if not username:
+        raise HTTPException(status_code=400, detail="Username required")
+
+    bio = sanitize_text(profile_request.bio) if profile_request.bio else None
+    if bio and len(bio) > getattr(settings, "max_bio_length", 200):
+        raise HTTPException(status_code=400, detail="Bio too long")
+
+    users_db[user_id] = {
+        "username": username,
+        "avatar": profile_request.avatar,
+        "bio": bio,
+    }
+    touch_user_state(user_id)
+    return build_user_profile(user_id)
+
+
 @app.post("/api/likes", tags=["Likes"])
 @limiter.limit(getattr(settings, "rate_limit_votes", "10/minute"))
 async def toggle_like(request: Request, like_data: dict = Body(...)):
@@ -497,6 +704,7 @@ async def toggle_like(request: Request, like_data: dict = Body(...)):
         user_likes_db[user_id].add(poll_id)
         poll["likes"] += 1
         liked = True
+    touch_user_state(user_id)
 
     return {
         "success": True,
@@ -505,6 +713,54 @@ async def toggle_like(request: Request, like_data: dict = Body(...)):
     }
 
 
+def check_heartbeat_size(heartbeat: PresenceHeartbeat):
+    """Reject heartbeats naming more polls than a page can show."""
+    if len(heartbeat.pollIds) > getattr(settings, "presence_max_polls_per_heartbeat", 50):
+        raise HTTPException(status_code=400, detail="Too many polls in heartbeat")
+
+
+@app.post("/api/presence/heartbeat", tags=["Presence"])
+@limiter.limit(getattr(settings, "rate_limit_presence", "30/minute"))
+async def presence_heartbeat(request: Request, heartbeat: PresenceHeartbeat):
+    """Mark a user as online and viewing pollIds; returns current viewer counts for those polls."""
+    check_heartbeat_size(heartbeat)
+    poll_ids = [poll_id for poll_id in heartbeat.pollIds if poll_id in polls_db]
+    presence.heartbeat(heartbeat.userId, poll_ids)
+    return {
+        "active_users": presence.active_users(),
+        "viewers": {poll_id: presence.viewers(poll_id) for poll_id in poll_ids},
+    }
+
+
+@app.post("/api/presence/leave", tags=["Presence"])
+@limiter.limit(getattr(settings, "rate_limit_presence", "30/minute"))
+async def presence_leave(request: Request, heartbeat: PresenceHeartbeat):
+    """Drop a user's presence immediately, e.g. when the page closes."""
+    check_heartbeat_size(heartbeat)
+    presence.leave(heartbeat.userId, heartbeat.pollIds)
+    return {"success": True}
+
+
+@app.get("/api/presence/viewers", tags=["Presence"])
+async def get_all_viewers():
+    """Viewer counts for every poll that currently has viewers."""
+    return presence.all_viewers()
+
+
+@app.get("/api/polls/{poll_id}/viewers", tags=["Presence"])
+async def get_poll_viewers(poll_id: str):
+    """Current viewers of a poll, plus an estimate of everyone who has viewed it."""
+    if poll_id not in polls_db:
+        presence.forget_poll(poll_id)
+        raise HTTPException(status_code=404, detail="Poll not found")
+
+    return {
+        "poll_id": poll_id,
+        "viewers": presence.viewers(poll_id),
+        "unique_viewers_estimate": presence.audience(poll_id),
+    }
+
+
 @app.post("/api/polls/{poll_id}/webhook", tags=["Webhooks"])
 async def add_webhook(poll_id: str, webhook: WebhookRequest):
     """Add webhook for poll notifications."""
@@ -548,6 +804,49 @@ async def export_csv(poll_id: str):
     )
 
 
+def poll_report_snapshot(poll: dict) -> dict:
+    """Picklable view of a poll for report workers, with stored HTML entities decoded."""
+    return {
+        "question": html.unescape(poll["question"]),
+        "total_votes": poll["total_votes"],
+        "options": [{"text": html.unescape(o["text"]), "votes": o["votes"]} for o in poll["options"]],
+    }
+
+
+@app.get("/api/polls/{poll_id}/export/pdf", tags=["Export"])
+async def export_pdf(poll_id: str):
+    """Export poll results as a PDF report."""
+    if poll_id not in polls_db:
+        raise HTTPException(status_code=404, detail="Poll not found")
+
+    poll = polls_db[poll_id]
+    content = await report_renderer.render(
+        "pdf", poll_id, poll.get("version", 0), poll_report_snapshot(poll)
+    )
+    return Response(
+        content=content,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f"attachment; filename=poll_{poll_id}.pdf"}
+    )
+
+
+@app.get("/api/polls/{poll_id}/export/png", tags=["Export"])
+async def export_png(poll_id: str):
+    """Export poll results as a bar chart image."""
+    if poll_id not in polls_db:
+        raise HTTPException(status_code=404, detail="Poll not found")
+
+    poll = polls_db[poll_id]
+    content = await report_renderer.render(
+        "png", poll_id, poll.get("version", 0), poll_report_snapshot(poll)
+    )
+    return Response(
+        content=content,
+        media_type="image/png",
+        headers={"Content-Disposition": f"inline; filename=poll_{poll_id}.png"}
+    )
+
+
 @app.get("/embed/{poll_id}", tags=["Embed"], response_class=HTMLResponse)
 async def embed_poll(poll_id: str):
     """Embed poll as iframe."""
@@ -637,4 +936,6 @@ async def embed_script():
 
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
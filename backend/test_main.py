@@ -3,20 +3,47 @@ QuickPoll - Comprehensive Test Suite
 Tests all features: Admin, AI, Embeds, QR, Export, Webhooks
 """
 import pytest
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 from datetime import datetime
 import json
 import base64
+import time
+import asyncio
 from unittest.mock import Mock, patch, AsyncMock
 import sys
 import os
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from main import app, polls_db, votes_db, webhooks_db, request_times
+from main import (
+    app,
+    presence,
+    report_renderer,
+    limiter,
+    polls_db,
+    votes_db,
+    webhooks_db,
+    request_times,
+    users_db,
+    user_votes_db,
+    user_likes_db,
+    user_polls_created,
+    user_state_versions,
+    poll_report_snapshot,
+)
 from app.config import settings
+from app.cache import TTLCache
+from app.reports import ReportRenderer
+from app.reports.renderers import RENDERERS
+from app.presence import HyperLogLog, PresenceTracker
+from app.services import StubBackend, generate_ai_poll, get_cache_stats, set_ai_backend, warm_up
+from benchmarks import startup
 
 client = TestClient(app)
+run_benchmarks = pytest.mark.skipif(
+    not os.environ.get("RUN_BENCHMARKS"), reason="timing benchmark; set RUN_BENCHMARKS=1 to run"
+)
 
 
 @pytest.fixture(autouse=True)
@@ -26,6 +53,13 @@ def reset_db():
     votes_db.clear()
     webhooks_db.clear()
     request_times.clear()
+    users_db.clear()
+    user_votes_db.clear()
+    user_likes_db.clear()
+    user_polls_created.clear()
+    user_state_versions.clear()
+    presence.clear()
+    limiter.reset()
     yield
 
 
@@ -94,5 +128,480 @@ class TestResponseTimeTracking:
         data = response.json()
         assert data["avg_response_time_ms"] >= 0
 
+
+class TestProfiler:
+    """Test admin profiling endpoints."""
+
+    admin_headers = {"X-Admin-Key": settings.admin_api_key}
+
+    def test_profiler_requires_admin_key(self):
+        """Test profiler endpoints are admin-only."""
+        response = client.post("/api/admin/profiler/start", headers={"X-Admin-Key": "wrong"})
+        assert response.status_code == 403
+
+    def test_sampling_profile_exports(self):
+        """Test a sampling session exports collapsed stacks and speedscope JSON."""
+        response = client.post(
+            "/api/admin/profiler/start",
+            json={"duration_seconds": 5, "interval_ms": 1},
+            headers=self.admin_headers,
+        )
+        assert response.status_code == 200
+        assert response.json()["running"] is True
+        assert response.json()["interval_ms"] == settings.profiler_min_interval_ms
+
+        conflict = client.post("/api/admin/profiler/start", headers=self.admin_headers)
+        assert conflict.status_code == 409
+
+        time.sleep(0.1)
+        stop = client.post("/api/admin/profiler/stop", headers=self.admin_headers)
+        assert stop.json()["running"] is False
+        assert stop.json()["samples"] > 0
+
+        collapsed = client.get("/api/admin/profiler/profile", headers=self.admin_headers)
+        assert collapsed.status_code == 200
+        first_line = collapsed.text.splitlines()[0]
+        assert first_line.startswith("thread:")
+        assert first_line.rsplit(" ", 1)[1].isdigit()
+
+        speedscope = client.get(
+            "/api/admin/profiler/profile?format=speedscope", headers=self.admin_headers
+        ).json()
+        profile = speedscope["profiles"][0]
+        assert profile["type"] == "sampled"
+        assert len(profile["samples"]) == len(profile["weights"])
+        assert speedscope["shared"]["frames"]
+
+    def test_request_profiling_header(self):
+        """Test a request can be profiled with cProfile via header."""
+        response = client.get("/", headers={**self.admin_headers, "X-Profile-Request": "1"})
+        assert response.status_code == 200
+        profile_id = response.headers["X-Profile-Id"]
+
+        report = client.get(
+            f"/api/admin/profiler/requests/{profile_id}", headers=self.admin_headers
+        )
+        assert report.status_code == 200
+        assert "function calls" in report.text
+
+    def test_request_profiling_ignored_without_admin_key(self):
+        """Test the profile header is ignored for non-admins."""
+        response = client.get("/", headers={"X-Admin-Key": "wrong", "X-Profile-Request": "1"})
+        assert "X-Profile-Id" not in response.headers
+
+    def test_blocking_call_reported(self):
+        """Test a synchronous call on the event loop is reported with its stack."""
+        with TestClient(app) as monitored:
+            with patch("main.generate_qr_code", side_effect=lambda poll_id: time.sleep(0.3) or ""):
+                monitored.post("/api/polls", json={
+                    "question": "Blocking test?",
+                    "options": ["A", "B"]
+                })
+            time.sleep(0.1)
+            report = monitored.get("/api/admin/profiler/blocking", headers=self.admin_headers).json()
+
+        assert report["enabled"] is True
+        assert any(
+            event["blocked_ms"] >= 250 and any("create_poll" in f for f in event["stack"])
+            for event in report["events"]
+        )
+
+
+class TestUserSession:
+    """Test the batched per-user session-state endpoint."""
+
+    def test_session_combines_votes_likes_and_profile(self):
+        """Test one request returns votes, likes and profile."""
+        poll = client.post("/api/polls", json={
+            "question": "Session test?",
+            "options": ["A", "B"],
+            "creator_id": "alice"
+        }).json()
+        client.post(f"/api/polls/{poll['id']}/vote", json={
+            "option_id": poll["options"][0]["id"],
+            "user_id": "alice"
+        })
+        client.post("/api/likes", json={"pollId": poll["id"], "userId": "alice"})
+
+        response = client.get("/api/users/alice/session")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["votes"] == {poll["id"]: poll["options"][0]["id"]}
+        assert data["likes"] == [poll["id"]]
+        assert data["profile"]["pollsCreated"] == 1
+        assert data["profile"]["totalVotes"] == 1
+
+    def test_unchanged_session_not_modified(self):
+        """Test a matching ETag returns an empty 304 until state changes."""
+        first = client.get("/api/users/bob/session")
+        etag = first.headers["ETag"]
+
+        cached = client.get("/api/users/bob/session", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+
+        client.put("/api/users/bob/profile", json={"username": "Bob", "bio": "Hi"})
+        changed = client.get("/api/users/bob/session", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["ETag"] != etag
+        assert changed.json()["profile"]["username"] == "Bob"
+
+    def test_profile_routes(self):
+        """Test profile defaults, updates and validation."""
+        assert client.get("/api/users/carol/profile").json()["username"] == "carol"
+
+        response = client.put("/api/users/carol/profile", json={
+            "username": "<b>Carol</b>",
+            "bio": "x" * 500
+        })
+        assert response.status_code == 400
+
+        response = client.put("/api/users/carol/profile", json={"username": "<b>Carol</b>"})
+        assert response.status_code == 200
+        assert "<b>" not in response.json()["username"]
+
+
+class TestReportExport:
+    """Test PDF and chart exports rendered in the process pool."""
+
+    def _create_poll(self):
+        return client.post("/api/polls", json={
+            "question": "Report test?",
+            "options": ["Yes", "No"]
+        }).json()
+
+    def test_export_png_and_pdf(self):
+        """Test chart and PDF exports return valid files."""
+        poll = self._create_poll()
+
+        png = client.get(f"/api/polls/{poll['id']}/export/png")
+        assert png.status_code == 200
+        assert png.headers["content-type"] == "image/png"
+        assert png.content.startswith(b"\x89PNG")
+
+        pdf = client.get(f"/api/polls/{poll['id']}/export/pdf")
+        assert pdf.status_code == 200
+        assert pdf.headers["content-type"] == "application/pdf"
+        assert pdf.content.startswith(b"%PDF")
+
+    def test_export_cached_per_poll_version(self):
+        """Test a report is rendered once per poll version."""
+        poll = self._create_poll()
+        renders = report_renderer.stats["renders"]
+
+        client.get(f"/api/polls/{poll['id']}/export/png")
+        client.get(f"/api/polls/{poll['id']}/export/png")
+        assert report_renderer.stats["renders"] == renders + 1
+
+        client.post(f"/api/polls/{poll['id']}/vote", json={"option_id": poll["options"][0]["id"]})
+        client.get(f"/api/polls/{poll['id']}/export/png")
+        assert report_renderer.stats["renders"] == renders + 2
+
+    def test_concurrent_renders_deduplicated(self):
+        """Test concurrent identical render requests share one render."""
+        snapshot = {"question": "Dedupe?", "total_votes": 1, "options": [{"text": "A", "votes": 1}]}
+        renders = report_renderer.stats["renders"]
+
+        async def burst():
+            return await asyncio.gather(*(
+                report_renderer.render("png", "dedupe", 0, snapshot) for _ in range(5)
+            ))
+
+        results = asyncio.run(burst())
+        assert report_renderer.stats["renders"] == renders + 1
+        assert len(set(results)) == 1
+
+    def test_burst_beyond_max_pending_rejected(self):
+        """Test a same-tick burst of distinct renders is capped by max_pending."""
+        renderer = ReportRenderer(max_workers=1, max_pending=2)
+        snapshot = {"question": "Burst?", "total_votes": 0, "options": [{"text": "A", "votes": 0}]}
+
+        async def burst():
+            return await asyncio.gather(*(
+                renderer.render("png", f"burst{i}", 0, snapshot) for i in range(6)
+            ), return_exceptions=True)
+
+        try:
+            results = asyncio.run(burst())
+        finally:
+            renderer.shutdown()
+        rejected = [r for r in results if isinstance(r, HTTPException)]
+        assert len(rejected) == 4
+        assert all(r.status_code == 503 for r in rejected)
+        assert renderer.stats["renders"] == 2
+
+    def test_export_user_text_drawn_literally(self):
+        """Test mathtext, HTML-escaped and duplicate option text all render."""
+        poll = client.post("/api/polls", json={
+            "question": "Cost in $ & \u20ac?",
+            "options": ["$_$", "<b>", "$_$"]
+        }).json()
+
+        snapshot = poll_report_snapshot(polls_db[poll["id"]])
+        assert snapshot["question"] == "Cost in $ & \u20ac?"
+        assert [o["text"] for o in snapshot["options"]] == ["$_$", "<b>", "$_$"]
+
+        assert client.get(f"/api/polls/{poll['id']}/export/png").status_code == 200
+        assert client.get(f"/api/polls/{poll['id']}/export/pdf").status_code == 200
+
+    def test_pdf_paginates_long_polls(self):
+        """Test a poll with more rows than fit on one page spills onto new pages."""
+        snapshot = {
+            "question": "Many options?",
+            "total_votes": 0,
+            "options": [{"text": f"Option {i}", "votes": 0} for i in range(80)],
+        }
+        pdf = asyncio.run(report_renderer.render("pdf", "long", 0, snapshot))
+        assert pdf.count(b"/Type /Page\n") > 1
+
+    def test_render_failure_returns_clean_error(self):
+        """Test an exception raised in a worker becomes a 500 and is not cached."""
+        renders = report_renderer.stats["renders"]
+        with patch.dict(RENDERERS, {"broken": int}):
+            for _ in range(2):
+                with pytest.raises(HTTPException) as exc:
+                    asyncio.run(report_renderer.render("broken", "broken", 0, {"options": []}))
+                assert exc.value.status_code == 500
+        assert report_renderer.stats["renders"] == renders + 2
+
+    def test_warm_up_failure_recorded(self):
+        """Test a failed warm-up is reported in the renderer stats."""
+        renderer = ReportRenderer()
+
+        async def warm():
+            with patch.object(renderer, "warm_up", AsyncMock(side_effect=RuntimeError("no fonts"))):
+                renderer.start_warm_up()
+                await asyncio.sleep(0)
+                await asyncio.sleep(0)
+
+        asyncio.run(warm())
+        assert renderer.get_stats()["warm_up"].startswith("failed")
+
+    def test_export_nonexistent_poll(self):
+        """Test exports for a missing poll return 404."""
+        assert client.get("/api/polls/nonexistent/export/pdf").status_code == 404
+
+
+
+class TestPresence:
+    """Test presence tracking and viewer counts."""
+
+    def test_heartbeat_feeds_viewers_and_admin_stats(self):
+        """Test heartbeats drive per-poll viewers and active_users_now."""
+        poll = client.post("/api/polls", json={
+            "question": "Presence test?",
+            "options": ["A", "B"]
+        }).json()
+
+        client.post("/api/presence/heartbeat", json={"userId": "u1", "pollIds": [poll["id"]]})
+        response = client.post("/api/presence/heartbeat", json={"userId": "u2", "pollIds": [poll["id"]]})
+        assert response.json() == {"active_users": 2, "viewers": {poll["id"]: 2}}
+        client.post("/api/presence/heartbeat", json={"userId": "u3"})
+
+        viewers = client.get(f"/api/polls/{poll['id']}/viewers").json()
+        assert viewers["viewers"] == 2
+        assert viewers["unique_viewers_estimate"] == 2
+
+        stats = client.get("/api/admin/stats", headers={"X-Admin-Key": settings.admin_api_key}).json()
+        assert stats["active_users_now"] == 3
+        assert stats["unique_viewers_estimate"] == 2
+
+        client.post("/api/presence/leave", json={"userId": "u1", "pollIds": [poll["id"]]})
+        assert client.get("/api/presence/viewers").json() == {poll["id"]: 1}
+
+    def test_leave_limited_like_heartbeat(self):
+        """Test leave enforces the heartbeat poll cap and rate limit."""
+        too_many = [f"p{i}" for i in range(settings.presence_max_polls_per_heartbeat + 1)]
+        response = client.post("/api/presence/leave", json={"userId": "u1", "pollIds": too_many})
+        assert response.status_code == 400
+
+        with patch.object(presence, "leave") as leave:
+            statuses = [
+                client.post("/api/presence/leave", json={"userId": "u1"}).status_code
+                for _ in range(40)
+            ]
+        assert 429 in statuses
+        assert leave.call_count < 40
+
+    def test_heartbeat_ignores_unknown_polls(self):
+        """Test made-up poll ids are not tracked."""
+        poll = client.post("/api/polls", json={
+            "question": "Presence test?",
+            "options": ["A", "B"]
+        }).json()
+
+        response = client.post("/api/presence/heartbeat", json={
+            "userId": "u1",
+            "pollIds": [poll["id"], "fake-1", "fake-2"]
+        })
+        assert response.json()["viewers"] == {poll["id"]: 1}
+        assert client.get("/api/presence/viewers").json() == {poll["id"]: 1}
+        assert presence.audience_count() == 1
+
+    def test_entries_expire_by_bucket(self):
+        """Test entries expire after the TTL and refreshed ones survive."""
+        now = [0.0]
+        tracker = PresenceTracker(ttl_seconds=10, bucket_seconds=1, clock=lambda: now[0])
+        tracker.heartbeat("a", ["p"])
+        tracker.heartbeat("b", ["p"])
+
+        now[0] = 8
+        tracker.heartbeat("a", ["p"])
+        assert tracker.viewers("p") == 2
+
+        now[0] = 11
+        assert tracker.viewers("p") == 1
+        assert tracker.active_users() == 1
+
+        now[0] = 19
+        assert tracker.viewers("p") == 0
+        assert len(tracker) == 0
+
+    def test_memory_bounded_under_churn(self):
+        """Test the tracker never holds more than max_entries."""
+        tracker = PresenceTracker(max_entries=100, clock=lambda: 0)
+        for i in range(1000):
+            tracker.heartbeat(f"user{i}", [f"poll{i % 7}"])
+        assert len(tracker) == 100
+        assert sum(tracker.all_viewers().values()) == 100
+        assert tracker.active_users() == 100
+
+    def test_audience_estimators_bounded(self):
+        """Test audience estimators are LRU-capped and dropped for deleted polls."""
+        tracker = PresenceTracker(max_entries=100, max_audiences=50, clock=lambda: 0)
+        for i in range(2000):
+            tracker.heartbeat(f"user{i}", [f"poll{i}"])
+        assert len(tracker) == 100
+        assert tracker.audience_count() == 50
+        assert tracker.audience("poll1999") == 1
+        assert tracker.audience("poll0") == 0
+
+        tracker.forget_poll("poll1999")
+        assert tracker.audience_count() == 49
+
+    def test_hyperloglog_estimate(self):
+        """Test HyperLogLog stays within a few percent on large audiences."""
+        hll = HyperLogLog(precision=10)
+        for i in range(50000):
+            hll.add(f"user{i}")
+            hll.add(f"user{i}")
+        assert abs(hll.count() - 50000) / 50000 < 0.1
+
+
+class TestStartup:
+    """Test fast-start budgets and lazy loading of optional subsystems."""
+
+    def test_import_defers_optional_subsystems(self):
+        """Test importing main does not load QR, webhook, AI or report libraries."""
+        result = startup.measure_import(runs=1)
+        assert result["loaded_deferred"] == []
+
+    @run_benchmarks
+    def test_import_time_within_budget(self):
+        """Test import main stays within its budget relative to import fastapi."""
+        result = startup.measure_import(runs=5)
+        assert result["ratio"] < startup.IMPORT_BUDGET_RATIO
+
+    @run_benchmarks
+    def test_first_request_within_budget(self):
+        """Test time-to-first-request stays within its budget relative to a bare app."""
+        result = startup.measure_first_request(runs=5)
+        assert result["status"] == 200
+        assert result["ratio"] < startup.FIRST_REQUEST_BUDGET_RATIO
+
+    def test_warm_up_reports_status(self):
+        """Test warm-up loads a subsystem and exposes its status to admins."""
+        status = warm_up(("qr",))
+        assert status["qr"]["loaded"] is True
+
+        response = client.get("/api/admin/subsystems", headers={
+            "X-Admin-Key": settings.admin_api_key
+        })
+        assert response.json()["qr"]["loaded"] is True
+
+
+class TestAIGeneration:
+    """Test AI poll generation caching and request coalescing."""
+
+    @pytest.fixture(autouse=True)
+    def stub_backend(self):
+        backend = StubBackend()
+        set_ai_backend(backend)
+        yield backend
+        set_ai_backend(None)
+
+    def test_generate_poll_with_stub(self, stub_backend):
+        """Test the endpoint returns a poll from the offline backend."""
+        response = client.post("/api/ai/generate-poll", json={"topic": "Python", "num_options": 3})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["question"]
+        assert len(data["options"]) == 3
+
+    def test_normalized_topics_share_cache(self, stub_backend):
+        """Test equivalent topics are served from cache."""
+        client.post("/api/ai/generate-poll", json={"topic": "Remote  work"})
+        client.post("/api/ai/generate-poll", json={"topic": "remote work?"})
+        client.post("/api/ai/generate-poll", json={"topic": "remote work", "num_options": 2})
+
+        assert stub_backend.calls == 2
+        assert get_cache_stats()["hits"] == 1
+
+    def test_concurrent_requests_coalesced(self, stub_backend):
+        """Test concurrent identical topics share one upstream call."""
+        stub_backend.latency_seconds = 0.05
+
+        async def burst():
+            return await asyncio.gather(*(generate_ai_poll("Coffee") for _ in range(20)))
+
+        results = asyncio.run(burst())
+        assert stub_backend.calls == 1
+        assert all(r == results[0] for r in results)
+        assert get_cache_stats()["coalesced"] == 19
+
+    def test_failures_not_cached(self, stub_backend):
+        """Test a failed generation is retried on the next request."""
+        with patch.object(stub_backend, "generate", AsyncMock(side_effect=RuntimeError("boom"))):
+            response = client.post("/api/ai/generate-poll", json={"topic": "Tea"})
+        assert response.status_code == 500
+
+        response = client.post("/api/ai/generate-poll", json={"topic": "Tea"})
+        assert response.status_code == 200
+
+    def test_upstream_rate_limit_only_counts_misses(self, stub_backend):
+        """Test cache hits stay available after upstream misses hit their limit."""
+        with patch.object(settings, "rate_limit_ai_generate", "2/minute"):
+            assert client.post("/api/ai/generate-poll", json={"topic": "Tea"}).status_code == 200
+            assert client.post("/api/ai/generate-poll", json={"topic": "Jam"}).status_code == 200
+            for _ in range(5):
+                assert client.post("/api/ai/generate-poll", json={"topic": "Tea"}).status_code == 200
+            response = client.post("/api/ai/generate-poll", json={"topic": "Scones"})
+
+        assert response.status_code == 429
+        assert stub_backend.calls == 2
+
+    def test_openai_disabled(self):
+        """Test the OpenAI backend reports 503 when not configured."""
+        set_ai_backend(None)
+        with patch.object(settings, "openai_enabled", False):
+            response = client.post("/api/ai/generate-poll", json={"topic": "Tea"})
+        assert response.status_code == 503
+
+    def test_ttl_cache_expiry_and_lru(self):
+        """Test cache entries expire and the least recently used is evicted."""
+        now = [0.0]
+        cache = TTLCache(ttl_seconds=10, max_entries=2, clock=lambda: now[0])
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+
+        now[0] = 11
+        assert cache.get("a") is None
+        assert len(cache) == 1
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v", "--tb=short"])
\ No newline at end of file
@@ -42,6 +42,7 @@ const Home = (props) => {
   const [pollViewers, setPollViewers] = useState({});
   const [optimisticVotes, setOptimisticVotes] = useState({});
   const wsRef = useRef(null);
+  const sessionEtagRef = useRef(null);
   const [aiPrompt, setAiPrompt] = useState('');
   const [isGeneratingAI, setIsGeneratingAI] = useState(false);
   const [qrCodeDialog, setQrCodeDialog] = useState({ open: false, pollId: null, qrCodeUrl: null });
@@ -70,18 +71,41 @@ const Home = (props) => {
 
     dispatch(setLoading(true));
     fetchPolls().finally(() => dispatch(setLoading(false)));
-    fetchUserVotes();
-    fetchUserLikes();
+    fetchUserSession();
 
     const pollInterval = setInterval(() => {
       fetchPolls();
-      fetchUserVotes();
-      fetchUserLikes();
+      fetchUserSession();
     }, 1500);
 
     return () => clearInterval(pollInterval);
   }, [userId]);
 
+  const visiblePollIdsRef = useRef([]);
+  visiblePollIdsRef.current = polls.slice(0, 50).map((poll) => poll.id);
+
+  useEffect(() => {
+    if (!userId) return;
+
+    sendPresenceHeartbeat();
+    const heartbeatInterval = setInterval(sendPresenceHeartbeat, 10000);
+
+    const leave = () => {
+      fetch(`${API_BASE_URL}/api/presence/leave`, {
+        method: 'POST',
+        keepalive: true,
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ userId, pollIds: visiblePollIdsRef.current }),
+      }).catch(() => {});
+    };
+    window.addEventListener('pagehide', leave);
+
+    return () => {
+      clearInterval(heartbeatInterval);
+      window.removeEventListener('pagehide', leave);
+    };
+  }, [userId]);
+
   const fetchPolls = async () => {
     try {
       const response = await fetch(`${API_BASE_URL}/api/polls`);
@@ -94,25 +118,33 @@ const Home = (props) => {
     }
   };
 
-  const fetchUserVotes = async () => {
+  const fetchUserSession = async () => {
     try {
-      const response = await fetch(`${API_BASE_URL}/api/user/${userId}/votes`);
+      const headers = sessionEtagRef.current ? { 'If-None-Match': sessionEtagRef.current } : {};
+      const response = await fetch(`${API_BASE_URL}/api/users/${userId}/session`, { headers, cache: 'no-store' });
+      if (response.status === 304) return;
+      if (!response.ok) throw new Error('Failed to fetch user session');
       const data = await response.json();
-      dispatch(setUserVotes(typeof data === 'object' && data !== null && !Array.isArray(data) ? data : {}));
+      sessionEtagRef.current = response.headers.get('ETag');
+      dispatch(setUserVotes(typeof data.votes === 'object' && data.votes !== null && !Array.isArray(data.votes) ? data.votes : {}));
+      dispatch(setUserLikes(Array.isArray(data.likes) ? data.likes : []));
     } catch (error) {
-      console.error('Error fetching user votes:', error);
-      dispatch(setUserVotes({}));
+      console.error('Error fetching user session:', error);
     }
   };
 
-  const fetchUserLikes = async () => {
+  const sendPresenceHeartbeat = async () => {
     try {
-      const response = await fetch(`${API_BASE_URL}/api/user/${userId}/likes`);
+      const response = await fetch(`${API_BASE_URL}/api/presence/heartbeat`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ userId, pollIds: visiblePollIdsRef.current }),
+      });
+      if (!response.ok) return;
       const data = await response.json();
-      dispatch(setUserLikes(Array.isArray(data) ? data : []));
+      setPollViewers(data.viewers || {});
     } catch (error) {
-      console.error('Error fetching user likes:', error);
-      dispatch(setUserLikes([]));
+      console.error('Error sending presence heartbeat:', error);
     }
   };
 